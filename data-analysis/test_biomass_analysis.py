@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import pytest
+
+import biomass_analysis
+from biomass_analysis import BiomassAnalyzer, PreprocessedImage, LOWER_GREEN, UPPER_GREEN, REDUCED_IMAGE_SIZE
+
+
+def _synthetic_image() -> np.ndarray:
+    """Fixed BGR image covering random pixels, pure colors and a zero EVI denominator."""
+    image = np.random.default_rng(0).integers(0, 256, size=(64, 64, 3), dtype=np.uint8)
+    image[0, 0] = (34, 0, 0)      # g + 6r - 7.5b + 1 == 0
+    image[0, 1] = (0, 255, 0)
+    image[0, 2] = (0, 0, 255)
+    image[0, 3] = (255, 255, 255)
+    image[0, 4] = (0, 0, 0)
+    return image
+
+
+def _preprocessed(image: np.ndarray) -> PreprocessedImage:
+    small = cv2.resize(image, (REDUCED_IMAGE_SIZE, REDUCED_IMAGE_SIZE), interpolation=cv2.INTER_AREA)
+    return PreprocessedImage(
+        bgr_u8=image,
+        hsv_u8=cv2.cvtColor(image, cv2.COLOR_BGR2HSV),
+        gray_small_u8=cv2.cvtColor(small, cv2.COLOR_BGR2GRAY),
+        lab_small_u8=cv2.cvtColor(small, cv2.COLOR_BGR2LAB)
+    )
+
+
+def _reference_features(image: np.ndarray) -> dict:
+    """EVI statistics from the original floating-point formula on [0, 1] values."""
+    blue, green, red = (image[..., c].astype(np.float64) / 255.0 for c in range(3))
+    den = green + 6 * red - 7.5 * blue + 1
+    zero = np.isclose(den, 0)
+    assert zero.any()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        evi = np.where(zero, 0.0, 2.5 * (green - red) / den)
+
+    mask = cv2.inRange(cv2.cvtColor(image, cv2.COLOR_BGR2HSV), LOWER_GREEN, UPPER_GREEN)
+    return {
+        'ndvi_mean': evi.mean(),
+        'ndvi_std': evi.std(),
+        'ndvi_min': evi.min(),
+        'ndvi_max': evi.max(),
+        'canopy_cover': np.count_nonzero(mask) / mask.size * 100
+    }
+
+
+def _assert_matches_reference(features: dict, expected: dict):
+    for name, value in expected.items():
+        assert features[name] == pytest.approx(value, rel=1e-5, abs=1e-6), name
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return BiomassAnalyzer()
+
+
+@pytest.mark.skipif(not biomass_analysis.NUMBA_AVAILABLE, reason="numba is not installed")
+@pytest.mark.parametrize("serial", [False, True], ids=["parallel", "serial"])
+def test_numba_pixel_features_match_float_evi(analyzer, serial):
+    image = _synthetic_image()
+    analyzer._serial_pixel_kernel = serial
+    try:
+        features = analyzer._compute_pixel_features(_preprocessed(image))
+    finally:
+        analyzer._serial_pixel_kernel = False
+
+    _assert_matches_reference(features, _reference_features(image))
+
+
+def test_opencv_pixel_features_match_float_evi(analyzer, monkeypatch):
+    monkeypatch.setattr(biomass_analysis, "NUMBA_AVAILABLE", False)
+    image = _synthetic_image()
+    features = analyzer._compute_pixel_features(_preprocessed(image))
+
+    _assert_matches_reference(features, _reference_features(image))